@@ -0,0 +1,30 @@
+"""
+Gunicorn configuration for the BlueGuard AI Prediction Service
+Usage: gunicorn -c gunicorn.conf.py ai_service:app
+       gunicorn -c gunicorn.conf.py ai_service_simple:app
+"""
+
+import os
+import sys
+
+# Keep native thread pools to one thread per worker; parallelism comes from
+# the worker processes. Must be set before numpy/tensorflow are imported.
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+
+bind = f"0.0.0.0:{os.environ.get('AI_SERVICE_PORT', '5001')}"
+
+workers = 2 * (os.cpu_count() or 1)
+worker_class = 'gthread'
+threads = 4
+
+# Load models once in the master so forked workers share them copy-on-write
+preload_app = True
+
+timeout = 120
+
+def when_ready(server):
+    """Build the preloaded service's predictor in the master, before workers fork"""
+    # ai_service creates its predictor lazily so that importing it has no side effects
+    service = sys.modules.get('ai_service')
+    if service is not None and hasattr(service, 'get_predictor'):
+        service.get_predictor()
@@ -0,0 +1,34 @@
+"""
+Memory helpers for BlueGuard model training
+Shrinks array dtypes before fitting so less memory moves through the fit loops
+"""
+
+import numpy as np
+
+INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+def downcast(data):
+    """Downcast an array, or each column of a DataFrame / dict of arrays, to the smallest dtype that holds it"""
+    if isinstance(data, dict):
+        return {name: downcast(values) for name, values in data.items()}
+    if hasattr(data, 'columns'):
+        return data.assign(**{col: downcast(data[col].to_numpy()) for col in data.columns})
+
+    values = np.asarray(data)
+    if values.size == 0:
+        return values
+
+    if values.dtype.kind in 'iu':
+        lo, hi = values.min(), values.max()
+        for dtype in INT_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= lo and hi <= info.max:
+                return values.astype(dtype, copy=False)
+        return values
+
+    if values.dtype.kind == 'f' and values.dtype.itemsize > 4:
+        finite = values[np.isfinite(values)]
+        if finite.size == 0 or np.abs(finite).max() <= np.finfo(np.float32).max:
+            return values.astype(np.float32)
+
+    return values
@@ -4,17 +4,49 @@ Demonstrates the AI prediction capabilities
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+import io
 import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Configuration
 AI_SERVICE_URL = "http://localhost:5001"
 BACKEND_URL = "http://localhost:5000"
 
+# Shared session so every test reuses pooled keep-alive connections
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+class ThreadBufferedStdout:
+    """stdout wrapper that buffers writes per thread while a capture is active"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+    
+    def capture(self, fn):
+        """Run fn with this thread's output buffered; return the captured text"""
+        self._local.buffer = io.StringIO()
+        try:
+            fn()
+            return self._local.buffer.getvalue()
+        finally:
+            self._local.buffer = None
+    
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer or self.stream).write(text)
+    
+    def flush(self):
+        self.stream.flush()
+
 def test_ai_service_health():
     """Test AI service health"""
     try:
-        response = requests.get(f"{AI_SERVICE_URL}/health")
+        response = session.get(f"{AI_SERVICE_URL}/health")
         print("🔍 AI Service Health Check:")
         print(json.dumps(response.json(), indent=2))
         return response.status_code == 200
@@ -35,7 +67,7 @@ def test_storm_surge_prediction():
     }
     
     try:
-        response = requests.post(f"{AI_SERVICE_URL}/predict/storm-surge", json=test_data)
+        response = session.post(f"{AI_SERVICE_URL}/predict/storm-surge", json=test_data)
         result = response.json()
         print(f"📊 Input: Wind {test_data['wind_speed']}m/s, Pressure {test_data['pressure']}hPa")
         print(f"🌊 Predicted surge height: {result.get('surge_height', 0):.2f}m")
@@ -59,7 +91,7 @@ def test_coastal_erosion_prediction():
     }
     
     try:
-        response = requests.post(f"{AI_SERVICE_URL}/predict/coastal-erosion", json=test_data)
+        response = session.post(f"{AI_SERVICE_URL}/predict/coastal-erosion", json=test_data)
         result = response.json()
         print(f"📊 Input: Wave energy {test_data['wave_energy']}, Vegetation {test_data['vegetation_cover']}%")
         print(f"⚠️  Erosion risk: {result.get('risk_level', 'unknown')}")
@@ -87,7 +119,7 @@ def test_blue_carbon_prediction():
     }
     
     try:
-        response = requests.post(f"{AI_SERVICE_URL}/predict/blue-carbon", json=test_data)
+        response = session.post(f"{AI_SERVICE_URL}/predict/blue-carbon", json=test_data)
         result = response.json()
         print(f"📊 Input: Water quality {test_data['water_quality']}%, Pollution {test_data['pollution_levels']}")
         print(f"⚠️  Threat level: {result.get('threat_level', 'unknown')}")
@@ -139,7 +171,7 @@ def test_comprehensive_analysis():
     }
     
     try:
-        response = requests.post(f"{AI_SERVICE_URL}/analyze/comprehensive", json=test_data)
+        response = session.post(f"{AI_SERVICE_URL}/analyze/comprehensive", json=test_data)
         result = response.json()
         
         print(f"🌡️  Overall risk level: {result.get('overall_risk', 'unknown')}")
@@ -174,7 +206,7 @@ def test_backend_ai_integration():
     print("\n🔗 Testing Backend AI Integration:")
     
     try:
-        response = requests.get(f"{BACKEND_URL}/api/ai/health")
+        response = session.get(f"{BACKEND_URL}/api/ai/health")
         result = response.json()
         print("✅ Backend AI health check:")
         print(json.dumps(result, indent=2))
@@ -193,16 +225,26 @@ def main():
         print("❌ AI service is not running. Please start it first.")
         return
     
-    # Test individual predictions
-    test_storm_surge_prediction()
-    test_coastal_erosion_prediction()
-    test_blue_carbon_prediction()
-    
-    # Test comprehensive analysis
-    test_comprehensive_analysis()
+    # Run the prediction, comprehensive analysis and backend integration tests
+    # concurrently; each test's output is buffered and printed in order
+    tests = (
+        test_storm_surge_prediction,
+        test_coastal_erosion_prediction,
+        test_blue_carbon_prediction,
+        test_comprehensive_analysis,
+        test_backend_ai_integration
+    )
+    stdout = ThreadBufferedStdout(sys.stdout)
+    sys.stdout = stdout
+    try:
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            futures = [executor.submit(stdout.capture, test) for test in tests]
+            outputs = [future.result() for future in futures]
+    finally:
+        sys.stdout = stdout.stream
     
-    # Test backend integration
-    test_backend_ai_integration()
+    for output in outputs:
+        print(output, end='')
     
     print("\n✅ All tests completed!")
     print("\n📚 BlueGuard AI System is ready for:")
@@ -1,22 +1,74 @@
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingClassifier
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import Pipeline
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, mean_squared_error
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, mean_squared_error, r2_score
 import xgboost as xgb
-import tensorflow as tf
-from tensorflow.keras.models import Sequential, Model
-from tensorflow.keras.layers import Dense, LSTM, Dropout, Input, Conv1D, MaxPooling1D, Flatten
-from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 import joblib
 import json
 import os
 from datetime import datetime, timedelta
+import pickle
+import multiprocessing
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
 warnings.filterwarnings('ignore')
 
+try:
+    import lz4  # noqa: F401  (enables joblib's lz4 compressor)
+    PREPROCESSOR_COMPRESS = ('lz4', 3)
+except ImportError:
+    PREPROCESSOR_COMPRESS = 0
+
+try:
+    from numba import njit, prange
+except ImportError:
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Fallback when numba is unavailable: run the kernels as plain Python"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+tf = None
+
+# Tree models train side by side in worker processes, so each gets a share of the cores
+TREE_N_JOBS = max(1, (os.cpu_count() or 1) // 4)
+
+# Classifiers compiled to native libraries, and the file naming the current build of each
+TREELITE_THREATS = ('coastal_erosion', 'blue_carbon_threat')
+TREELITE_MANIFEST = 'treelite_libs.json'
+
+def _get_tf():
+    """Import TensorFlow on first use so sklearn-only callers never load it"""
+    global tf
+    if tf is None:
+        import tensorflow
+        tf = tensorflow
+    return tf
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _erosion_risk_codes(wave_energy, vegetation_cover, slope_angle, storm_frequency):
+    """Fused erosion score and bucketing: 0=low, 1=medium, 2=high, 3=critical"""
+    out = np.empty(wave_energy.shape[0], np.int8)
+    for i in prange(wave_energy.shape[0]):
+        score = (wave_energy[i] / 10 + (100 - vegetation_cover[i]) / 100 +
+                 slope_angle[i] / 30 + storm_frequency[i] / 5)
+        out[i] = 0 if score < 1.0 else 1 if score < 2.0 else 2 if score < 3.0 else 3
+    return out
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _blue_carbon_threat_codes(water_quality, pollution_levels, human_activity, climate_factors, biodiversity_index):
+    """Fused threat score and bucketing: 0=minimal, 1=moderate, 2=significant, 3=severe"""
+    out = np.empty(water_quality.shape[0], np.int8)
+    for i in prange(water_quality.shape[0]):
+        score = ((100 - water_quality[i]) / 100 + pollution_levels[i] / 5 + human_activity[i] / 10 +
+                 abs(climate_factors[i]) + (100 - biodiversity_index[i]) / 100)
+        out[i] = 0 if score < 1.5 else 1 if score < 2.5 else 2 if score < 3.5 else 3
+    return out
+
 class BlueGuardAITrainer:
     """
     Advanced AI training system for BlueGuard coastal threat detection
@@ -29,6 +81,7 @@ class BlueGuardAITrainer:
         self.models = {}
         self.scalers = {}
         self.encoders = {}
+        self.rng = np.random.default_rng(42)
         
         # Create directories if they don't exist
         os.makedirs(data_path, exist_ok=True)
@@ -39,17 +92,21 @@ class BlueGuardAITrainer:
             'storm_surge': {
                 'type': 'regression',
                 'features': ['wind_speed', 'pressure', 'tide_height', 'wave_height', 'temperature'],
-                'target': 'surge_height'
+                'target': 'surge_height',
+                'requires_scaling': False
             },
             'coastal_erosion': {
                 'type': 'classification',
                 'features': ['wave_energy', 'sediment_type', 'vegetation_cover', 'slope_angle', 'storm_frequency'],
-                'target': 'erosion_risk_level'
+                'target': 'erosion_risk_level',
+                'requires_scaling': False,
+                'categorical_features': ['sediment_type']
             },
             'blue_carbon_threat': {
                 'type': 'multiclass',
                 'features': ['water_quality', 'pollution_levels', 'human_activity', 'climate_factors', 'biodiversity_index'],
-                'target': 'threat_category'
+                'target': 'threat_category',
+                'requires_scaling': False
             },
             'weather_prediction': {
                 'type': 'time_series',
@@ -63,7 +120,6 @@ class BlueGuardAITrainer:
         Generate synthetic training data for initial model training
         In production, this would be replaced with real historical data
         """
-        np.random.seed(42)
         config = self.model_configs[threat_type]
         
         if threat_type == 'storm_surge':
@@ -82,122 +138,87 @@ class BlueGuardAITrainer:
         data = {}
         
         # Weather features
-        data['wind_speed'] = np.random.gamma(2, 5, num_samples)  # Wind speed in m/s
-        data['pressure'] = np.random.normal(1013, 15, num_samples)  # Atmospheric pressure in hPa
-        data['temperature'] = np.random.normal(25, 8, num_samples)  # Temperature in Celsius
+        data['wind_speed'] = self.rng.gamma(2, 5, num_samples).astype(np.float32)  # Wind speed in m/s
+        data['pressure'] = self.rng.normal(1013, 15, num_samples).astype(np.float32)  # Atmospheric pressure in hPa
+        data['temperature'] = self.rng.normal(25, 8, num_samples).astype(np.float32)  # Temperature in Celsius
         
         # Ocean features
-        data['tide_height'] = np.random.normal(2.0, 0.8, num_samples)  # Tide height in meters
-        data['wave_height'] = 0.3 * data['wind_speed'] + np.random.normal(0, 0.5, num_samples)
+        data['tide_height'] = self.rng.normal(2.0, 0.8, num_samples).astype(np.float32)  # Tide height in meters
+        data['wave_height'] = 0.3 * data['wind_speed'] + self.rng.normal(0, 0.5, num_samples).astype(np.float32)
         
         # Calculate surge height based on physical relationships
         surge_base = (data['wind_speed'] / 10) ** 2 * 0.1  # Wind effect
         surge_pressure = (1013 - data['pressure']) * 0.01  # Pressure effect
         surge_tide = data['tide_height'] * 0.3  # Tide amplification
         
-        data['surge_height'] = surge_base + surge_pressure + surge_tide + np.random.normal(0, 0.2, num_samples)
+        data['surge_height'] = surge_base + surge_pressure + surge_tide + self.rng.normal(0, 0.2, num_samples).astype(np.float32)
         data['surge_height'] = np.maximum(data['surge_height'], 0)  # Ensure non-negative
         
-        return pd.DataFrame(data)
+        return data
     
     def _generate_erosion_data(self, num_samples):
         """Generate synthetic coastal erosion data"""
         data = {}
         
-        data['wave_energy'] = np.random.exponential(5, num_samples)  # Wave energy index
-        data['sediment_type'] = np.random.choice(['sand', 'clay', 'rock', 'mixed'], num_samples)
-        data['vegetation_cover'] = np.random.beta(2, 2, num_samples) * 100  # Percentage
-        data['slope_angle'] = np.random.gamma(2, 5, num_samples)  # Degrees
-        data['storm_frequency'] = np.random.poisson(3, num_samples)  # Storms per year
-        
-        # Calculate erosion risk based on factors
-        risk_score = (
-            data['wave_energy'] / 10 +
-            (100 - data['vegetation_cover']) / 100 +
-            data['slope_angle'] / 30 +
-            data['storm_frequency'] / 5
+        data['wave_energy'] = self.rng.exponential(5, num_samples).astype(np.float32)  # Wave energy index
+        data['sediment_type'] = self.rng.choice(['sand', 'clay', 'rock', 'mixed'], num_samples)
+        data['vegetation_cover'] = self.rng.beta(2, 2, num_samples).astype(np.float32) * 100  # Percentage
+        data['slope_angle'] = self.rng.gamma(2, 5, num_samples).astype(np.float32)  # Degrees
+        data['storm_frequency'] = self.rng.poisson(3, num_samples).astype(np.float32)  # Storms per year
+        
+        # Calculate erosion risk based on factors and convert to risk levels
+        risk_codes = _erosion_risk_codes(
+            data['wave_energy'], data['vegetation_cover'], data['slope_angle'], data['storm_frequency']
         )
+        risk_levels = np.array(['low', 'medium', 'high', 'critical'])
+        data['erosion_risk_level'] = risk_levels[risk_codes]
         
-        # Convert to risk levels
-        erosion_risk = []
-        for score in risk_score:
-            if score < 1.0:
-                erosion_risk.append('low')
-            elif score < 2.0:
-                erosion_risk.append('medium')
-            elif score < 3.0:
-                erosion_risk.append('high')
-            else:
-                erosion_risk.append('critical')
-        
-        data['erosion_risk_level'] = erosion_risk
-        
-        return pd.DataFrame(data)
+        return data
     
     def _generate_blue_carbon_data(self, num_samples):
         """Generate synthetic blue carbon ecosystem threat data"""
         data = {}
         
-        data['water_quality'] = np.random.beta(3, 2, num_samples) * 100  # Quality index 0-100
-        data['pollution_levels'] = np.random.exponential(2, num_samples)  # Pollution index
-        data['human_activity'] = np.random.gamma(2, 3, num_samples)  # Activity intensity
-        data['climate_factors'] = np.random.normal(0, 1, num_samples)  # Standardized climate index
-        data['biodiversity_index'] = np.random.beta(2, 1, num_samples) * 100  # Biodiversity 0-100
+        data['water_quality'] = self.rng.beta(3, 2, num_samples).astype(np.float32) * 100  # Quality index 0-100
+        data['pollution_levels'] = self.rng.exponential(2, num_samples).astype(np.float32)  # Pollution index
+        data['human_activity'] = self.rng.gamma(2, 3, num_samples).astype(np.float32)  # Activity intensity
+        data['climate_factors'] = self.rng.normal(0, 1, num_samples).astype(np.float32)  # Standardized climate index
+        data['biodiversity_index'] = self.rng.beta(2, 1, num_samples).astype(np.float32) * 100  # Biodiversity 0-100
         
         # Threat categories based on multiple factors
-        threat_scores = (
-            (100 - data['water_quality']) / 100 +
-            data['pollution_levels'] / 5 +
-            data['human_activity'] / 10 +
-            np.abs(data['climate_factors']) +
-            (100 - data['biodiversity_index']) / 100
+        threat_codes = _blue_carbon_threat_codes(
+            data['water_quality'], data['pollution_levels'], data['human_activity'],
+            data['climate_factors'], data['biodiversity_index']
         )
+        threat_levels = np.array(['minimal', 'moderate', 'significant', 'severe'])
+        data['threat_category'] = threat_levels[threat_codes]
         
-        threat_categories = []
-        for score in threat_scores:
-            if score < 1.5:
-                threat_categories.append('minimal')
-            elif score < 2.5:
-                threat_categories.append('moderate')
-            elif score < 3.5:
-                threat_categories.append('significant')
-            else:
-                threat_categories.append('severe')
-        
-        data['threat_category'] = threat_categories
-        
-        return pd.DataFrame(data)
+        return data
     
     def _generate_weather_sequence_data(self, num_samples):
         """Generate time series weather data for LSTM training"""
         sequence_length = 168  # 7 days of hourly data
         
-        # Generate time series features
-        time_data = []
-        for i in range(num_samples):
-            # Create a weather sequence with trends and patterns
-            base_temp = np.random.normal(25, 5)
-            temp_trend = np.random.normal(0, 0.1, sequence_length).cumsum()
-            daily_cycle = 5 * np.sin(2 * np.pi * np.arange(sequence_length) / 24)
-            
-            temperature = base_temp + temp_trend + daily_cycle + np.random.normal(0, 1, sequence_length)
-            
-            base_pressure = np.random.normal(1013, 10)
-            pressure_trend = np.random.normal(0, 0.5, sequence_length).cumsum()
-            pressure = base_pressure + pressure_trend + np.random.normal(0, 2, sequence_length)
-            
-            wind_base = np.random.exponential(3)
-            wind_variation = np.random.normal(0, 0.5, sequence_length).cumsum()
-            wind_speed = wind_base + wind_variation + np.random.exponential(1, sequence_length)
-            wind_speed = np.maximum(wind_speed, 0)
-            
-            time_data.append({
-                'temperature': temperature,
-                'pressure': pressure,
-                'wind_speed': wind_speed
-            })
+        # Generate all sequences at once, one (num_samples, sequence_length) array per feature
+        hours = np.arange(sequence_length)
+        
+        # Weather sequences with trends and patterns
+        base_temp = self.rng.normal(25, 5, (num_samples, 1)).astype(np.float32)
+        temp_trend = (self.rng.standard_normal((num_samples, sequence_length), dtype=np.float32) * 0.1).cumsum(axis=1)
+        daily_cycle = (5 * np.sin(2 * np.pi * hours / 24)).astype(np.float32)
+        temperature = base_temp + temp_trend + daily_cycle + self.rng.standard_normal((num_samples, sequence_length), dtype=np.float32)
         
-        return time_data
+        base_pressure = self.rng.normal(1013, 10, (num_samples, 1)).astype(np.float32)
+        pressure_trend = (self.rng.standard_normal((num_samples, sequence_length), dtype=np.float32) * 0.5).cumsum(axis=1)
+        pressure = base_pressure + pressure_trend + self.rng.standard_normal((num_samples, sequence_length), dtype=np.float32) * 2
+        
+        wind_base = self.rng.exponential(3, (num_samples, 1)).astype(np.float32)
+        wind_variation = (self.rng.standard_normal((num_samples, sequence_length), dtype=np.float32) * 0.5).cumsum(axis=1)
+        wind_speed = wind_base + wind_variation + self.rng.standard_exponential((num_samples, sequence_length), dtype=np.float32)
+        wind_speed = np.maximum(wind_speed, 0)
+        
+        # One contiguous (num_samples, sequence_length) array per feature
+        return {'temperature': temperature, 'pressure': pressure, 'wind_speed': wind_speed}
     
     def preprocess_data(self, data, threat_type):
         """Preprocess data for training"""
@@ -207,18 +228,33 @@ class BlueGuardAITrainer:
             # Handle time series data differently
             return self._preprocess_time_series(data)
         
-        # Handle categorical variables
-        categorical_cols = data.select_dtypes(include=['object']).columns
-        for col in categorical_cols:
-            if col not in self.encoders:
-                self.encoders[col] = LabelEncoder()
-                data[col] = self.encoders[col].fit_transform(data[col])
-            else:
-                data[col] = self.encoders[col].transform(data[col])
+        # Look columns up by name (dict of arrays or DataFrame); string columns become
+        # integer codes, keeping the sorted categories as the codebook
+        native_categorical = config.get('categorical_features', [])
+        columns = {}
+        for col in config['features'] + [config['target']]:
+            values = np.asarray(data[col])
+            if values.dtype.kind in 'OUS':
+                if col not in self.encoders:
+                    self.encoders[col] = np.unique(values)
+                categories = self.encoders[col]
+                codes = np.searchsorted(categories, values)
+                known = categories[np.minimum(codes, len(categories) - 1)] == values
+                if col in native_categorical:
+                    # XGBoost splits on the codes as categories; values outside the codebook become missing
+                    values = np.where(known, codes, np.nan)
+                else:
+                    # Values outside the codebook get -1
+                    values = np.where(known, codes, -1).astype(np.int16)
+            columns[col] = values
         
         # Separate features and target
-        X = data[config['features']]
-        y = data[config['target']]
+        X = np.column_stack([columns[col] for col in config['features']]).astype(np.float32)
+        y = columns[config['target']]
+        
+        # Tree ensembles are invariant to feature scaling
+        if not config.get('requires_scaling', True):
+            return X, y
         
         # Scale features
         scaler_name = f"{threat_type}_scaler"
@@ -232,23 +268,24 @@ class BlueGuardAITrainer:
     
     def _preprocess_time_series(self, time_data):
         """Preprocess time series data for LSTM"""
-        sequences = []
-        targets = []
-        
-        for sequence in time_data:
-            # Prepare input sequences (first 144 hours) and targets (next 24 hours)
-            temp_seq = sequence['temperature'][:144]
-            pressure_seq = sequence['pressure'][:144]
-            wind_seq = sequence['wind_speed'][:144]
-            
-            # Combine features
-            combined_seq = np.column_stack([temp_seq, pressure_seq, wind_seq])
-            sequences.append(combined_seq)
-            
-            # Target: next 24 hours of temperature
-            targets.append(sequence['temperature'][144:168])
-        
-        return np.array(sequences), np.array(targets)
+        if isinstance(time_data, dict):
+            # Per-feature (N, hours) arrays: stack only the 144 input hours
+            X = np.stack([
+                time_data['temperature'][:, :144],
+                time_data['pressure'][:, :144],
+                time_data['wind_speed'][:, :144]
+            ], axis=-1)
+            return X, time_data['temperature'][:, 144:168]
+        
+        if not isinstance(time_data, np.ndarray):
+            # List of per-sequence feature dicts: stack into (N, hours, 3) once
+            time_data = np.stack([
+                np.column_stack([sequence['temperature'], sequence['pressure'], sequence['wind_speed']])
+                for sequence in time_data
+            ])
+        
+        # Input sequences (first 144 hours) and targets (next 24 hours of temperature)
+        return time_data[:, :144, :], time_data[:, 144:168, 0]
     
     def train_storm_surge_model(self, data):
         """Train Random Forest model for storm surge prediction"""
@@ -261,16 +298,21 @@ class BlueGuardAITrainer:
             max_depth=15,
             min_samples_split=5,
             min_samples_leaf=2,
+            max_features='sqrt',
+            max_samples=0.7,
+            bootstrap=True,
             random_state=42,
-            n_jobs=-1
+            n_jobs=TREE_N_JOBS
         )
         
         model.fit(X_train, y_train)
         
         # Evaluate
-        train_score = model.score(X_train, y_train)
-        test_score = model.score(X_test, y_test)
+        # One ensemble traversal per split
+        y_train_pred = model.predict(X_train)
         y_pred = model.predict(X_test)
+        train_score = r2_score(y_train, y_train_pred)
+        test_score = r2_score(y_test, y_pred)
         rmse = np.sqrt(mean_squared_error(y_test, y_pred))
         
         print(f"Storm Surge Model Performance:")
@@ -285,18 +327,27 @@ class BlueGuardAITrainer:
         """Train XGBoost model for coastal erosion classification"""
         X, y = self.preprocess_data(data, 'coastal_erosion')
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        config = self.model_configs['coastal_erosion']
         
-        # XGBoost for classification
+        # XGBoost for classification, splitting on sediment_type codes as categories
         model = xgb.XGBClassifier(
             n_estimators=100,
             max_depth=6,
             learning_rate=0.1,
             subsample=0.8,
             colsample_bytree=0.8,
+            tree_method='hist',
+            enable_categorical=True,
+            feature_types=['c' if f in config['categorical_features'] else 'q' for f in config['features']],
+            n_jobs=TREE_N_JOBS,
+            early_stopping_rounds=10,
             random_state=42
         )
         
-        model.fit(X_train, y_train)
+        # Stop adding rounds once loss on a held-out slice of the training data plateaus
+        X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=0.1, random_state=42)
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        print(f"Early stopping kept {model.best_iteration + 1} of {model.n_estimators} rounds")
         
         # Evaluate
         y_pred = model.predict(X_test)
@@ -315,16 +366,18 @@ class BlueGuardAITrainer:
         return model
     
     def train_blue_carbon_model(self, data):
-        """Train Gradient Boosting model for blue carbon threat assessment"""
+        """Train XGBoost model for blue carbon threat assessment"""
         X, y = self.preprocess_data(data, 'blue_carbon_threat')
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
-        # Gradient Boosting for multi-class classification
-        model = GradientBoostingClassifier(
+        # XGBoost histogram boosting for multi-class classification
+        model = xgb.XGBClassifier(
             n_estimators=150,
             max_depth=8,
             learning_rate=0.1,
             subsample=0.8,
+            tree_method='hist',
+            n_jobs=TREE_N_JOBS,
             random_state=42
         )
         
@@ -348,55 +401,103 @@ class BlueGuardAITrainer:
     
     def train_weather_lstm_model(self, time_data):
         """Train LSTM model for weather prediction"""
+        tf = _get_tf()
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import Dense, LSTM, Dropout
+        from tensorflow.keras.optimizers import Adam
+        from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+        
         X, y = self._preprocess_time_series(time_data)
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
-        # Build LSTM model
-        model = Sequential([
-            LSTM(64, return_sequences=True, input_shape=(144, 3)),
-            Dropout(0.2),
-            LSTM(32, return_sequences=False),
-            Dropout(0.2),
-            Dense(50, activation='relu'),
-            Dense(24, activation='linear')  # Predict next 24 hours
-        ])
+        # Build LSTM model with mixed precision compute; default LSTM args keep the cuDNN kernel.
+        # The policy only applies while building, so other models in the process stay float32
+        previous_policy = tf.keras.mixed_precision.global_policy()
+        tf.keras.mixed_precision.set_global_policy(
+            'mixed_float16' if tf.config.list_physical_devices('GPU') else 'mixed_bfloat16'
+        )
+        try:
+            model = Sequential([
+                LSTM(64, return_sequences=True, input_shape=(144, 3)),
+                Dropout(0.2),
+                LSTM(32, return_sequences=False),
+                Dropout(0.2),
+                Dense(50, activation='relu'),
+                Dense(24, activation='linear', dtype='float32')  # Predict next 24 hours, float32 outputs
+            ])
+        finally:
+            tf.keras.mixed_precision.set_global_policy(previous_policy)
         
         model.compile(
             optimizer=Adam(learning_rate=0.001),
             loss='mse',
-            metrics=['mae']
+            metrics=['mae'],
+            jit_compile=True  # XLA-fuse the LSTM/Dropout/Dense graph
         )
         
         # Training callbacks
         early_stopping = EarlyStopping(patience=10, restore_best_weights=True)
         checkpoint = ModelCheckpoint(
-            f'{self.models_path}/weather_lstm_best.h5',
+            f'{self.models_path}/weather_lstm_best',  # SavedModel directory
             save_best_only=True,
             monitor='val_loss'
         )
         
+        # Input pipelines: cache the tensors once, reshuffle every epoch, overlap batching with training
+        train_ds = (
+            tf.data.Dataset.from_tensor_slices((X_train.astype(np.float32), y_train.astype(np.float32)))
+            .cache()
+            .shuffle(1024, seed=42)
+            .batch(32)
+            .prefetch(tf.data.AUTOTUNE)
+        )
+        val_ds = (
+            tf.data.Dataset.from_tensor_slices((X_test.astype(np.float32), y_test.astype(np.float32)))
+            .batch(64)
+            .cache()
+            .prefetch(tf.data.AUTOTUNE)
+        )
+        
         # Train model
         history = model.fit(
-            X_train, y_train,
-            validation_data=(X_test, y_test),
+            train_ds,
+            validation_data=val_ds,
             epochs=50,
-            batch_size=32,
             callbacks=[early_stopping, checkpoint],
             verbose=1
         )
         
         # Evaluate
-        train_loss = model.evaluate(X_train, y_train, verbose=0)
-        test_loss = model.evaluate(X_test, y_test, verbose=0)
+        train_loss = model.evaluate(train_ds, verbose=0)
+        test_loss = model.evaluate(val_ds, verbose=0)
         
         print(f"Weather LSTM Model Performance:")
         print(f"Train Loss (MSE): {train_loss[0]:.4f}")
         print(f"Test Loss (MSE): {test_loss[0]:.4f}")
         print(f"Test MAE: {test_loss[1]:.4f}")
         
+        # Variables are float32 under mixed precision; keep a float32 model for saving and export
+        model = self._float32_copy(model)
+        model.save(f'{self.models_path}/weather_lstm_best')
         self.models['weather_prediction'] = model
+        
+        # int8 TFLite and ONNX builds for CPU inference
+        self.quantize_weather_model(X_train)
+        self.export_weather_onnx()
         return model
     
+    def _float32_copy(self, model):
+        """Rebuild a mixed precision Sequential model with float32 layers and the same weights"""
+        config = model.get_config()
+        for layer in config['layers']:
+            if layer['class_name'] != 'InputLayer':
+                layer['config']['dtype'] = 'float32'
+        
+        float_model = _get_tf().keras.Sequential.from_config(config)
+        float_model.set_weights(model.get_weights())
+        float_model.compile(optimizer='adam', loss='mse', metrics=['mae'], jit_compile=True)
+        return float_model
+    
     def train_all_models(self):
         """Train all BlueGuard AI models"""
         print("Training BlueGuard AI Models...")
@@ -409,18 +510,27 @@ class BlueGuardAITrainer:
         blue_carbon_data = self.generate_synthetic_data('blue_carbon_threat')
         weather_data = self.generate_synthetic_data('weather_prediction', 1000)  # Smaller for LSTM
         
-        # Train models
-        print("\n1. Training Storm Surge Prediction Model...")
-        self.train_storm_surge_model(storm_data)
-        
-        print("\n2. Training Coastal Erosion Model...")
-        self.train_erosion_model(erosion_data)
-        
-        print("\n3. Training Blue Carbon Threat Model...")
-        self.train_blue_carbon_model(blue_carbon_data)
-        
-        print("\n4. Training Weather Prediction LSTM...")
-        self.train_weather_lstm_model(weather_data)
+        # Tree models train in worker processes while the LSTM trains here
+        jobs = {
+            'storm_surge': storm_data,
+            'coastal_erosion': erosion_data,
+            'blue_carbon_threat': blue_carbon_data,
+        }
+        with ProcessPoolExecutor(max_workers=len(jobs), mp_context=_pool_context()) as executor:
+            futures = [
+                executor.submit(_train_tree_model, threat_type, data, self.data_path, self.models_path)
+                for threat_type, data in jobs.items()
+            ]
+            
+            print("\nTraining Weather Prediction LSTM...")
+            self.train_weather_lstm_model(weather_data)
+            
+            for future in as_completed(futures):
+                threat_type, model, scalers, encoders = future.result()
+                self.models[threat_type] = model
+                self.scalers.update(scalers)
+                self.encoders.update(encoders)
+                print(f"Finished training {threat_type} model")
         
         print("\nAll models trained successfully!")
     
@@ -428,22 +538,232 @@ class BlueGuardAITrainer:
         """Save all trained models and preprocessors"""
         print("Saving models and preprocessors...")
         
-        # Save sklearn/xgboost models
+        # Save sklearn/xgboost models uncompressed so their arrays can be memory-mapped on load
         for name, model in self.models.items():
             if name != 'weather_prediction':  # LSTM saved separately
-                joblib.dump(model, f'{self.models_path}/{name}_model.joblib')
+                joblib.dump(model, f'{self.models_path}/{name}_model.joblib', compress=0,
+                            protocol=pickle.HIGHEST_PROTOCOL)
         
-        # Save preprocessors
-        joblib.dump(self.scalers, f'{self.models_path}/scalers.joblib')
-        joblib.dump(self.encoders, f'{self.models_path}/encoders.joblib')
+        # Save preprocessors (small, loaded eagerly, so LZ4 costs nothing on read)
+        joblib.dump(self.scalers, f'{self.models_path}/scalers.joblib',
+                    compress=PREPROCESSOR_COMPRESS, protocol=pickle.HIGHEST_PROTOCOL)
+        joblib.dump(self.encoders, f'{self.models_path}/encoders.joblib',
+                    compress=PREPROCESSOR_COMPRESS, protocol=pickle.HIGHEST_PROTOCOL)
         
         # Save model configurations
         with open(f'{self.models_path}/model_configs.json', 'w') as f:
-            json.dump(self.model_configs, f, indent=2)
+            json.dump(self.model_configs, f, separators=(',', ':'))
+        
+        # Export fused scaler+model graphs for ONNX Runtime inference
+        self.export_onnx_models()
+        
+        # Compile the tree ensembles to native libraries for treelite inference
+        self.export_treelite_models()
+        
+        # Export the LSTM as a float16 TFLite model for CPU inference
+        if 'weather_prediction' in self.models:
+            self.export_tflite_model()
         
         print("Models saved successfully!")
     
-    def load_models(self):
+    def export_treelite_models(self):
+        """Compile the classifier tree ensembles to shared libraries with treelite"""
+        # Every export goes to a new versioned path named in treelite_libs.json: a serving process keeps
+        # the previous library mapped, and dlopen would hand back its cached handle for a reused path
+        manifest_path = f'{self.models_path}/{TREELITE_MANIFEST}'
+        generation = 1
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                generation = json.load(f).get('generation', 0) + 1
+        
+        try:
+            import treelite
+            import treelite.sklearn
+        except ImportError:
+            print("treelite not installed, skipping native tree compilation")
+            treelite = None
+        
+        libs = {}
+        for threat_type in TREELITE_THREATS:
+            if treelite is None or threat_type not in self.models:
+                continue
+            
+            model = self.models[threat_type]
+            libpath = f'{self.models_path}/{threat_type}.{generation}.so'
+            try:
+                if isinstance(model, xgb.XGBModel):
+                    # Early stopping keeps the rejected rounds in the booster; compile only up to the best one
+                    booster = model.get_booster()
+                    best_iteration = getattr(model, 'best_iteration', None)
+                    if best_iteration is not None:
+                        booster = booster[:best_iteration + 1]
+                    tl_model = treelite.Model.from_xgboost(booster)
+                else:
+                    tl_model = treelite.sklearn.import_model(model)
+                tl_model.export_lib(
+                    toolchain='gcc',
+                    libpath=libpath,
+                    params={'parallel_comp': 32}
+                )
+                libs[threat_type] = os.path.basename(libpath)
+            except Exception as e:
+                print(f"treelite compilation failed for {threat_type}: {e}")
+                if os.path.exists(libpath):
+                    os.remove(libpath)
+        
+        # Publish the new set atomically, then delete superseded and failed builds so a stale
+        # library never pairs with freshly trained encoders; processes that mapped one keep their copy
+        tmp_path = f'{manifest_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'generation': generation, 'libs': libs}, f, separators=(',', ':'))
+        os.replace(tmp_path, manifest_path)
+        
+        for name in os.listdir(self.models_path):
+            if name.endswith('.so') and name.split('.')[0] in TREELITE_THREATS and name not in libs.values():
+                os.remove(f'{self.models_path}/{name}')
+    
+    def export_tflite_model(self):
+        """Convert the weather LSTM to a float16-quantized TFLite model"""
+        # Fallback build; quantize_weather_model writes the int8 variant after training
+        tf = _get_tf()
+        try:
+            converter = tf.lite.TFLiteConverter.from_keras_model(self.models['weather_prediction'])
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            converter.target_spec.supported_types = [tf.float16]
+            tflite_model = converter.convert()
+            
+            tflite_path = f'{self.models_path}/weather_lstm_fp16.tflite'
+            with open(tflite_path, 'wb') as f:
+                f.write(tflite_model)
+            return tflite_path
+        except Exception as e:
+            print(f"TFLite export failed: {e}")
+            return None
+    
+    def quantize_weather_model(self, calibration_data):
+        """Convert the weather LSTM to an int8 TFLite model calibrated on training sequences"""
+        tf = _get_tf()
+        model = self.models['weather_prediction']
+        
+        def representative_dataset():
+            for i in range(min(100, len(calibration_data))):
+                yield [calibration_data[i:i + 1].astype(np.float32)]
+        
+        try:
+            # Full-integer kernels; inputs and outputs stay float32 for the service
+            converter = tf.lite.TFLiteConverter.from_keras_model(model)
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            converter.representative_dataset = representative_dataset
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+            tflite_model = converter.convert()
+        except Exception as e:
+            # LSTMs do not always convert to full integer; fall back to dynamic-range int8 weights
+            print(f"Full-integer quantization failed ({e}), using dynamic-range quantization")
+            try:
+                converter = tf.lite.TFLiteConverter.from_keras_model(model)
+                converter.optimizations = [tf.lite.Optimize.DEFAULT]
+                tflite_model = converter.convert()
+            except Exception as e:
+                print(f"TFLite int8 export failed: {e}")
+                return None
+        
+        tflite_path = f'{self.models_path}/weather_lstm_int8.tflite'
+        with open(tflite_path, 'wb') as f:
+            f.write(tflite_model)
+        return tflite_path
+    
+    def export_weather_onnx(self):
+        """Export the weather LSTM to ONNX and quantize its weights to int8 for ONNX Runtime"""
+        try:
+            import onnx
+            import tf2onnx
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+        except ImportError:
+            print("tf2onnx/onnxruntime not installed, skipping LSTM ONNX export")
+            return None
+        
+        tf = _get_tf()
+        float_path = f'{self.models_path}/weather_lstm.onnx'
+        int8_path = f'{self.models_path}/weather_lstm_int8.onnx'
+        try:
+            input_signature = (tf.TensorSpec((None, 144, 3), tf.float32, name='X'),)
+            onnx_model, _ = tf2onnx.convert.from_keras(
+                self.models['weather_prediction'], input_signature=input_signature, opset=17
+            )
+            onnx.save(onnx_model, float_path)
+            quantize_dynamic(float_path, int8_path, weight_type=QuantType.QInt8)
+            return int8_path
+        except Exception as e:
+            print(f"LSTM ONNX export failed: {e}")
+            return None
+    
+    def export_onnx_models(self):
+        """Export scaler+model pipelines to ONNX for the prediction service"""
+        try:
+            from skl2onnx import convert_sklearn, update_registered_converter
+            from skl2onnx.common.data_types import FloatTensorType
+            from skl2onnx.common.shape_calculator import calculate_linear_classifier_output_shapes
+        except ImportError:
+            print("skl2onnx not installed, skipping ONNX export")
+            for threat_type in ['storm_surge', 'coastal_erosion', 'blue_carbon_threat']:
+                self._remove_stale_onnx(threat_type)
+            return
+        
+        # XGBoost models need the onnxmltools converter registered with skl2onnx
+        try:
+            from onnxmltools.convert.xgboost.operator_converters.XGBoost import convert_xgboost
+            update_registered_converter(
+                xgb.XGBClassifier, 'XGBoostXGBClassifier',
+                calculate_linear_classifier_output_shapes, convert_xgboost,
+                options={'nocl': [True, False], 'zipmap': [True, False, 'columns']}
+            )
+        except ImportError:
+            pass
+        
+        for threat_type in ['storm_surge', 'coastal_erosion', 'blue_carbon_threat']:
+            if threat_type not in self.models:
+                continue
+            
+            onnx_path = f'{self.models_path}/{threat_type}.onnx'
+            if self.model_configs[threat_type].get('categorical_features'):
+                # ONNX tree ensembles have no categorical splits; drop any stale export
+                print(f"Skipping ONNX export for {threat_type}: model uses categorical splits")
+                self._remove_stale_onnx(threat_type)
+                continue
+            
+            model = self.models[threat_type]
+            steps = [('model', model)]
+            scaler = self.scalers.get(f"{threat_type}_scaler")
+            if scaler is not None:
+                steps.insert(0, ('scaler', scaler))
+            pipeline = Pipeline(steps)
+            
+            # Emit probabilities as a plain tensor instead of a list of dicts
+            options = {id(model): {'zipmap': False}} if hasattr(model, 'predict_proba') else None
+            num_features = len(self.model_configs[threat_type]['features'])
+            
+            try:
+                onx = convert_sklearn(
+                    pipeline,
+                    initial_types=[('X', FloatTensorType([None, num_features]))],
+                    options=options,
+                    target_opset={'': 15, 'ai.onnx.ml': 3}
+                )
+                with open(onnx_path, 'wb') as f:
+                    f.write(onx.SerializeToString())
+            except Exception as e:
+                # Converter errors can embed whole graph dumps; log only the start of the first line
+                message = (str(e).splitlines() or [''])[0][:200]
+                print(f"ONNX export failed for {threat_type}: {type(e).__name__}: {message}")
+                self._remove_stale_onnx(threat_type)
+    
+    def _remove_stale_onnx(self, threat_type):
+        """Delete an ONNX graph from an earlier run so the service falls back to the fresh joblib model"""
+        path = f'{self.models_path}/{threat_type}.onnx'
+        if os.path.exists(path):
+            os.remove(path)
+    
+    def load_models(self, include_lstm=True):
         """Load all trained models and preprocessors"""
         print("Loading models and preprocessors...")
         
@@ -452,12 +772,13 @@ class BlueGuardAITrainer:
             for threat_type in ['storm_surge', 'coastal_erosion', 'blue_carbon_threat']:
                 model_path = f'{self.models_path}/{threat_type}_model.joblib'
                 if os.path.exists(model_path):
+                    # No mmap_mode: RF Tree nodes are rebuilt on unpickle and XGBoost deserializes its
+                    # booster, so nothing here would be memory-mapped; each worker holds its own copy
                     self.models[threat_type] = joblib.load(model_path)
             
-            # Load LSTM model
-            lstm_path = f'{self.models_path}/weather_lstm_best.h5'
-            if os.path.exists(lstm_path):
-                self.models['weather_prediction'] = tf.keras.models.load_model(lstm_path)
+            # Load LSTM model (imports TensorFlow)
+            if include_lstm:
+                self.load_lstm_model()
             
             # Load preprocessors
             if os.path.exists(f'{self.models_path}/scalers.joblib'):
@@ -473,6 +794,32 @@ class BlueGuardAITrainer:
             print(f"Error loading models: {e}")
             return False
 
+    def load_lstm_model(self):
+        """Load the weather LSTM checkpoint if one exists, preferring the SavedModel over legacy HDF5"""
+        for lstm_path in (f'{self.models_path}/weather_lstm_best', f'{self.models_path}/weather_lstm_best.h5'):
+            if os.path.exists(lstm_path):
+                self.models['weather_prediction'] = _get_tf().keras.models.load_model(lstm_path)
+                return True
+        return False
+
+TREE_TRAINERS = {
+    'storm_surge': BlueGuardAITrainer.train_storm_surge_model,
+    'coastal_erosion': BlueGuardAITrainer.train_erosion_model,
+    'blue_carbon_threat': BlueGuardAITrainer.train_blue_carbon_model,
+}
+
+def _pool_context():
+    """Fresh-interpreter workers: forking a threaded caller (the service's batchers, ONNX Runtime, TF) can deadlock"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+def _train_tree_model(threat_type, data, data_path, models_path):
+    """Train one tree model in a worker process and return it with its fitted preprocessors"""
+    trainer = BlueGuardAITrainer(data_path=data_path, models_path=models_path)
+    model = TREE_TRAINERS[threat_type](trainer, data)
+    return threat_type, model, trainer.scalers, trainer.encoders
+
 if __name__ == "__main__":
     # Initialize and train the BlueGuard AI system
     trainer = BlueGuardAITrainer()
@@ -24,7 +24,7 @@ python train_models.py
 
 # Start AI service in background
 echo "Starting AI service..."
-python ai_service.py &
+gunicorn -c gunicorn.conf.py ai_service:app &
 
 echo "BlueGuard AI Service setup complete!"
 echo "AI Service running on http://localhost:5001"